@@ -30,7 +30,7 @@ from .grind import get_grind_arg_parser  # noqa: F401
 from .main import GrepText  # noqa: F401
 from .options import Options  # noqa: F401
 from .recognizer import GZIP_MAGIC, FileRecognizer, get_recognizer  # noqa: F401
-from .utils import get_line_offsets, get_regex, is_binary_string  # noqa: F401
+from .utils import count_lines, get_line_offsets, get_regex, is_binary_string  # noqa: F401
 
 
 def get_version(version=None):
@@ -26,6 +26,8 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 
+import functools
+
 __all__ = ["colorize"]
 
 
@@ -40,11 +42,37 @@ COLOR_TABLE = [
     "white",
     "default",
 ]
+COLOR_INDEX = {name: index for index, name in enumerate(COLOR_TABLE)}
 COLOR_STYLE = {
     "filename": dict(fg="green", bold=True),
     "searchterm": dict(fg="black", bg="yellow"),
 }
 
+STYLE_END = "\x1b[0m"
+
+
+@functools.lru_cache(maxsize=64)
+def style_prefix(fg=None, bg=None, bold=False, underline=False, reverse=False):
+    """Compute the ANSI escape sequence that starts the given style.
+
+    Only a handful of styles are ever used, so the result is cached and
+    colorize() reduces to a lookup plus string concatenation.
+    """
+    style_fragments = []
+    if fg in COLOR_INDEX:
+        # Foreground colors go from 30-39
+        style_fragments.append(COLOR_INDEX[fg] + 30)
+    if bg in COLOR_INDEX:
+        # Background colors go from 40-49
+        style_fragments.append(COLOR_INDEX[bg] + 40)
+    if bold:
+        style_fragments.append(1)
+    if underline:
+        style_fragments.append(4)
+    if reverse:
+        style_fragments.append(7)
+    return "\x1b[" + ";".join(map(str, style_fragments)) + "m"
+
 
 def colorize(s, fg=None, bg=None, bold=False, underline=False, reverse=False):
     """Wraps a string with ANSI color escape sequences corresponding to the
@@ -71,20 +99,4 @@ def colorize(s, fg=None, bg=None, bold=False, underline=False, reverse=False):
     -------
     A string with embedded color escape sequences.
     """
-
-    style_fragments = []
-    if fg in COLOR_TABLE:
-        # Foreground colors go from 30-39
-        style_fragments.append(COLOR_TABLE.index(fg) + 30)
-    if bg in COLOR_TABLE:
-        # Background colors go from 40-49
-        style_fragments.append(COLOR_TABLE.index(bg) + 40)
-    if bold:
-        style_fragments.append(1)
-    if underline:
-        style_fragments.append(4)
-    if reverse:
-        style_fragments.append(7)
-    style_start = "\x1b[" + ";".join(map(str, style_fragments)) + "m"
-    style_end = "\x1b[0m"
-    return style_start + s + style_end
+    return "{}{}{}".format(style_prefix(fg=fg, bg=bg, bold=bold, underline=underline, reverse=reverse), s, STYLE_END)
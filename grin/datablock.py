@@ -53,6 +53,9 @@ class DataBlock:
         self.end = end
         self.before_count = before_count
         self.is_last = is_last
+        # Cache slot filled in by get_line_offsets(); the data never changes
+        # after construction, so the scan result can be reused.
+        self.line_offsets = None
 
 
 EMPTY_DATABLOCK = DataBlock()
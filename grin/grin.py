@@ -25,21 +25,285 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import argparse
+import concurrent.futures
+import errno
 import fnmatch
-import gzip
+import io
+import locale
+import mmap
 import os
 import re
 import shlex
 import sys
+import zlib
+
+try:
+    import rapidgzip
+except ImportError:
+    rapidgzip = None
 
 from .main import GrepText
-from .recognizer import get_recognizer
+from .recognizer import GZIP_MAGIC, get_recognizer
 from .utils import deprecate_option, get_regex
 
 __all__ = ["get_filenames", "get_grin_arg_parser"]
 
 
+class _MmapFile:
+    """Minimal file-like wrapper around a read-only mmap of a regular file.
+
+    The mapped pages are faulted in on demand by the kernel, so grepping does
+    not pay for a separate kernel-to-userspace copy of the whole file the way
+    a plain read() does.
+    """
+
+    def __init__(self, filename):
+        self._fd = os.open(filename, os.O_RDONLY)
+        try:
+            self._mmap = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            os.close(self._fd)
+            raise
+        # Tell the kernel we will read the whole mapping front to back so it
+        # can ramp up readahead. Purely advisory and not available everywhere.
+        try:
+            self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+            self._mmap.madvise(mmap.MADV_WILLNEED)
+        except (AttributeError, OSError):
+            pass
+        try:
+            os.posix_fadvise(self._fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except (AttributeError, OSError):
+            pass
+
+    def fileno(self):
+        return self._fd
+
+    def read(self, size=-1):
+        return self._mmap.read(size)
+
+    def readline(self):
+        return self._mmap.readline()
+
+    def tell(self):
+        return self._mmap.tell()
+
+    def close(self):
+        self._mmap.close()
+        os.close(self._fd)
+
+
+def _mmap_open(filename, mode="rb"):
+    """Open a text file for grepping, memory-mapping it when possible.
+
+    mmap rejects zero-length files, so fall back to the builtin open() for
+    those (and for anything else the platform refuses to map).
+    """
+    try:
+        return _MmapFile(filename)
+    except (OSError, ValueError):
+        return open(filename, mode)
+
+
+class _RawGzipStream(io.RawIOBase):
+    """Raw stream that inflates a gzip file incrementally through zlib.
+
+    Feeding 64 KiB input chunks straight into zlib.decompressobj avoids the
+    per-read bookkeeping of gzip.GzipFile while keeping memory bounded by the
+    chunk size instead of the decompressed size. Errors mirror GzipFile's:
+    OSError for corrupt data and EOFError for a truncated stream, so the
+    caller's plain-text fallback keeps working.
+    """
+
+    def __init__(self, filename):
+        super().__init__()
+        self._filename = filename
+        self._fd = os.open(filename, os.O_RDONLY)
+        self._decomp = None
+        self._pending = b""
+        self._eof = False
+        self._first = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._pending and not self._eof:
+            self._inflate_chunk()
+        n = min(len(b), len(self._pending))
+        b[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+    def _inflate_chunk(self):
+        data = os.read(self._fd, 65536)
+        if self._first:
+            # Settle the not-a-gzip case on the two magic bytes before
+            # setting up a decompressor; the caller falls back to the
+            # plain-text opener without a single inflate call.
+            if data and not data.startswith(GZIP_MAGIC):
+                raise OSError("Not a gzipped file (%r)" % self._filename)
+            self._first = False
+        if not data:
+            if self._decomp is not None and not self._decomp.eof:
+                raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+            self._eof = True
+            return
+        chunks = []
+        while data:
+            if self._decomp is None:
+                self._decomp = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            try:
+                chunks.append(self._decomp.decompress(data))
+            except zlib.error:
+                raise OSError("Not a gzipped file (%r)" % self._filename)
+            if not self._decomp.eof:
+                break
+            # A complete member was decoded; any leftover bytes should be
+            # the start of another member (gzip files may concatenate).
+            data = self._decomp.unused_data
+            self._decomp = None
+        self._pending = b"".join(chunks)
+
+    def close(self):
+        if not self.closed:
+            os.close(self._fd)
+        super().close()
+
+
+def _fast_gzip_open(filename, mode="rb"):
+    """Open a gzip file as a buffered stream over the raw zlib inflater."""
+    return io.BufferedReader(_RawGzipStream(filename), 65536)
+
+
+class _RapidgzipStream:
+    """Delegate reads to a rapidgzip handle, normalizing its errors.
+
+    The grep driver relies on the gzip.GzipFile contract (OSError or
+    EOFError) to retry a broken gzip as plain text; rapidgzip raises its own
+    exception types at read time, so they are translated here.
+    """
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+
+    def read(self, size=-1):
+        try:
+            return self._fileobj.read(size)
+        except EOFError:
+            raise
+        except Exception as e:
+            raise OSError(str(e))
+
+    def readline(self):
+        try:
+            return self._fileobj.readline()
+        except EOFError:
+            raise
+        except Exception as e:
+            raise OSError(str(e))
+
+    def close(self):
+        self._fileobj.close()
+
+
+def _gzip_open(filename, mode="rb"):
+    """Open a gzip file for grepping, decompressing in parallel if possible.
+
+    rapidgzip decodes DEFLATE streams on all cores when it is installed; it
+    stays strictly optional and the zlib stream above is the fallback. Both
+    paths stream: the decompressed data is consumed block by block, never
+    materialized whole.
+    """
+    if rapidgzip is not None:
+        try:
+            return _RapidgzipStream(rapidgzip.open(filename, parallelization=os.cpu_count() or 1))
+        except EOFError:
+            raise
+        except Exception as e:
+            raise OSError(str(e))
+    return _fast_gzip_open(filename, mode)
+
+
+def _iter_null_separated(fp):
+    """Yield NUL-separated tokens from a stream without slurping it whole."""
+    pending = ""
+    read = fp.read
+    while True:
+        chunk = read(65536)
+        if not chunk:
+            break
+        pending += chunk
+        if "\0" in pending:
+            parts = pending.split("\0")
+            pending = parts.pop()
+            for part in parts:
+                yield part.strip()
+    if pending:
+        yield pending.strip()
+
+
+def _iter_null_separated_file(filename):
+    """Yield NUL-separated tokens from a regular file via an mmap scan.
+
+    The buffer is scanned in place with find(), so no intermediate copy of
+    the (possibly huge) file list is built.
+    """
+    encoding = locale.getpreferredencoding(False)
+    with open(filename, "rb") as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Zero-length or unmappable; small enough to just read.
+            buf = f.read()
+    try:
+        find = buf.find
+        size = len(buf)
+        pos = 0
+        while pos < size:
+            nul = find(b"\0", pos)
+            if nul < 0:
+                nul = size
+            yield bytes(buf[pos:nul]).decode(encoding).strip()
+            pos = nul + 1
+    finally:
+        if isinstance(buf, mmap.mmap):
+            buf.close()
+
+
+def _iter_candidate_files(args):
+    """Lazily yield the raw, unfiltered filename candidates to consider."""
+    # If the user has given us a file with filenames, consume them first.
+    # XXX: how can I detect bad filenames? One user accidentally ran
+    # grin -f against a binary file and got an unhelpful error message
+    # later.
+    if args.files_from_file is not None:
+        if args.files_from_file == "-":
+            if args.null_separated:
+                for fn in _iter_null_separated(sys.stdin):
+                    yield fn
+            else:
+                for line in sys.stdin:
+                    yield line.strip()
+        elif os.path.exists(args.files_from_file):
+            if args.null_separated:
+                for fn in _iter_null_separated_file(args.files_from_file):
+                    yield fn
+            else:
+                with open(args.files_from_file) as files_file:
+                    for line in files_file:
+                        yield line.strip()
+        else:
+            raise IOError(2, "No such file: %r" % args.files_from_file)
+
+    # Now add the filenames provided on the command line itself.
+    for fn in args.files:
+        yield fn
+    if args.sys_path:
+        for fn in sys.path:
+            yield fn
+
+
 def get_filenames(args):
     """Generate the filenames to grep.
 
@@ -58,70 +322,57 @@ def get_filenames(args):
     ------
     IOError if a requested file cannot be found.
     """
-    files = []
-    # If the user has given us a file with filenames, consume them first.
-    if args.files_from_file is not None:
-        if args.files_from_file == "-":
-            files_file = sys.stdin
-            should_close = False
-        elif os.path.exists(args.files_from_file):
-            files_file = open(args.files_from_file)
-            should_close = True
-        else:
-            raise IOError(2, "No such file: %r" % args.files_from_file)
-
-        try:
-            # Remove ''
-            # XXX: how can I detect bad filenames? One user accidentally ran
-            # grin -f against a binary file and got an unhelpful error message
-            # later.
-            if args.null_separated:
-                files.extend([x.strip() for x in files_file.read().split("\0")])
-            else:
-                files.extend([x.strip() for x in files_file])
-        finally:
-            if should_close:
-                files_file.close()
-
-    # Now add the filenames provided on the command line itself.
-    files.extend(args.files)
-    if args.sys_path:
-        files.extend(sys.path)
-    # Make sure we don't have any empty strings lying around.
-    # Also skip certain special null files which may be added by programs like
-    # Emacs.
+    # Names to ignore: empty strings and certain special null files which may
+    # be added by programs like Emacs.
     if sys.platform == "win32":
         upper_bad = set(["NUL:", "NUL"])
         raw_bad = set([""])
     else:
         upper_bad = set()
         raw_bad = set(["", "/dev/null"])
-    files = [fn for fn in files if fn not in raw_bad and fn.upper() not in upper_bad]
-    if len(files) == 0:
-        # Add the current directory at least.
-        files = ["."]
 
-    # Go over our list of filenames and see if we can recognize each as
-    # something we want to grep.
+    # Compile the include glob once instead of paying the fnmatch.fnmatch()
+    # translation machinery per visited file.
+    include_match = re.compile(fnmatch.translate(args.include)).match
+    basename = os.path.basename
     fr = get_recognizer(args)
-    for fn in files:
+
+    def recognize_candidate(fn):
         # Special case text stdin.
         if fn == "-":
             yield fn, "text"
-            continue
+            return
         kind = fr.recognize(fn, None)
-        if kind in ("text", "gzip") and fnmatch.fnmatch(os.path.basename(fn), args.include):
+        if kind in ("text", "gzip") and include_match(basename(fn)) is not None:
             yield fn, kind
         elif kind == "directory":
             for filename, k in fr.walk(fn):
-                if k in ("text", "gzip") and fnmatch.fnmatch(os.path.basename(filename), args.include):
+                if k in ("text", "gzip") and include_match(basename(filename)) is not None:
                     yield filename, k
         # XXX: warn about other files?
         # XXX: handle binary?
 
+    # Stream candidates through recognition as they arrive; grepping can start
+    # before a long -f list has even been fully read.
+    got_one = False
+    for fn in _iter_candidate_files(args):
+        if fn in raw_bad or fn.upper() in upper_bad:
+            continue
+        got_one = True
+        for item in recognize_candidate(fn):
+            yield item
+    if not got_one:
+        # Search the current directory at least.
+        for item in recognize_candidate("."):
+            yield item
+
 
 def get_grin_arg_parser(parser=None):
     """Create the command-line parser."""
+    # Imported here so that merely importing the package does not pay for
+    # argparse; it is only needed when a parser is actually built.
+    import argparse
+
     from . import __version__
 
     if parser is None:
@@ -376,10 +627,23 @@ def get_grin_arg_parser(parser=None):
     )
     parser.add_argument("--sys-path", action="store_true", help="search the directories on sys.path")
 
+    parser.add_argument(
+        "--raw-output",
+        action="store_true",
+        default=None,
+        help="encode each report once and write it to the binary stdout layer [default when piping the output]",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of files to grep in parallel; 0 means one per CPU [default=%(default)r]",
+    )
     parser.add_argument(
         "-x",
         "--encoding",
-        default=sys.stdout.encoding,
+        default=None,
         help="Encoding from which to open the included files from in order for the regex"
         " and the stdout output to work properly. Default to your terminal output encoding.",
     )
@@ -389,6 +653,40 @@ def get_grin_arg_parser(parser=None):
     return parser
 
 
+def _make_report_writer(raw_output):
+    """Return the callable used to emit one report string.
+
+    When output goes to a pipe or file, skip the TextIOWrapper and write
+    pre-encoded bytes; that encodes each report in one C call instead of
+    re-encoding line fragments through the text layer.
+    """
+    if raw_output and hasattr(sys.stdout, "buffer"):
+        out_encoding = sys.stdout.encoding or "utf8"
+        out_errors = sys.stdout.errors or "strict"
+        buffer_write = sys.stdout.buffer.write
+
+        def write_report(report):
+            buffer_write(report.encode(out_encoding, out_errors))
+
+        return write_report
+    return sys.stdout.write
+
+
+def _run_greps(args, grep_one, write_report):
+    """Grep every candidate file, fanning out to a thread pool for -j."""
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if jobs > 1:
+        # Grep several files at once; reports are still printed in
+        # discovery order so the output matches the serial run.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(grep_one, filename, kind) for filename, kind in get_filenames(args)]
+            for future in futures:
+                write_report(future.result())
+    else:
+        for filename, kind in get_filenames(args):
+            write_report(grep_one(filename, kind))
+
+
 def main(argv=None):
     try:
         if argv is None:
@@ -408,22 +706,40 @@ def main(argv=None):
         else:
             args.use_color = (args.color == "auto" and isatty) or args.color == "always"
 
+        if args.raw_output is None:
+            args.raw_output = not isatty
+        write_report = _make_report_writer(args.raw_output)
+
+        # Resolve the default encoding at run time rather than at parser
+        # construction; sys.stdout may be a pipe with no encoding at all.
+        if args.encoding is None:
+            args.encoding = sys.stdout.encoding or "utf8"
+
+        # Split the comma-separated skip lists exactly once, up front, into
+        # the containers the recognizer tests against per directory entry.
+        args.skip_dirs = frozenset(s for s in args.skip_dirs.split(",") if s)
+        args.skip_exts = tuple(s for s in args.skip_exts.split(",") if s)
+
         regex = get_regex(args)
         g = GrepText(regex, args)
-        openers = dict(text=open, gzip=gzip.open)
-        for filename, kind in get_filenames(args):
+        openers = dict(text=_mmap_open, gzip=_gzip_open)
+
+        def grep_one(filename, kind):
             try:
-                report = g.grep_a_file(filename, opener=openers[kind], encoding=args.encoding)
+                return g.grep_a_file(filename, opener=openers[kind], encoding=args.encoding)
             except (OSError, EOFError):
                 if kind != "gzip":
                     raise  # probably shouldn't happen; something weird
-                report = g.grep_a_file(filename, opener=openers["text"], encoding=args.encoding)
-            sys.stdout.write(report)
+                return g.grep_a_file(filename, opener=openers["text"], encoding=args.encoding)
+
+        _run_greps(args, grep_one, write_report)
     except KeyboardInterrupt:
         raise SystemExit(0)
+    except BrokenPipeError:
+        # The user is probably piping to a pager like less(1) and has exited
+        # it. Just exit.
+        raise SystemExit(0)
     except IOError as e:
-        if "Broken pipe" in str(e):
-            # The user is probably piping to a pager like less(1) and has exited
-            # it. Just exit.
+        if e.errno == errno.EPIPE:
             raise SystemExit(0)
         raise
@@ -25,9 +25,10 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import argparse
+import errno
 import fnmatch
 import os
+import re
 import shlex
 import sys
 
@@ -39,6 +40,10 @@ __all__ = ["get_grind_arg_parser"]
 
 def get_grind_arg_parser(parser=None):
     """Create the command-line parser for the find-like companion program."""
+    # Imported here so that merely importing the package does not pay for
+    # argparse; it is only needed when a parser is actually built.
+    import argparse
+
     from . import __version__
 
     if parser is None:
@@ -184,16 +189,26 @@ def main(argv=None):
         if args.sys_path:
             args.dirs.extend(sys.path)
 
+        # Split the comma-separated skip lists exactly once, up front, into
+        # the containers the recognizer tests against per directory entry.
+        args.skip_dirs = frozenset(s for s in args.skip_dirs.split(",") if s)
+        args.skip_exts = tuple(s for s in args.skip_exts.split(",") if s)
+
+        # Compile the glob once rather than re-translating it per file.
+        glob_match = re.compile(fnmatch.translate(args.glob)).match
+        basename = os.path.basename
         fr = get_recognizer(args)
         for dir in args.dirs:
             for filename, k in fr.walk(dir):
-                if fnmatch.fnmatch(os.path.basename(filename), args.glob):
+                if glob_match(basename(filename)) is not None:
                     output(filename)
     except KeyboardInterrupt:
         raise SystemExit(0)
+    except BrokenPipeError:
+        # The user is probably piping to a pager like less(1) and has exited
+        # it. Just exit.
+        raise SystemExit(0)
     except IOError as e:
-        if "Broken pipe" in str(e):
-            # The user is probably piping to a pager like less(1) and has exited
-            # it. Just exit.
+        if e.errno == errno.EPIPE:
             raise SystemExit(0)
         raise
@@ -26,18 +26,20 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import bisect
+import codecs
+import functools
 import gzip
-import itertools
+import mmap
 import os
 import re
 import stat
 import sys
 from io import UnsupportedOperation
 
-from .colors import COLOR_STYLE, colorize
+from .colors import COLOR_STYLE, STYLE_END, style_prefix
 from .datablock import EMPTY_DATABLOCK, DataBlock
 from .options import Options
-from .utils import get_line_offsets, to_str
+from .utils import FixedStringPattern, count_lines, get_line_offsets, to_str
 
 __all__ = ["GrepText"]
 
@@ -50,6 +52,40 @@ POST = 1
 # Target amount of data to read into memory at a time.
 READ_BLOCKSIZE = 16 * 1024 * 1024
 
+# Characters that give a regex atom meaning beyond the literal character.
+_RE_SPECIALS = frozenset("\\^$.|?*+()[]{}")
+
+
+def _required_literal(pattern, flags):
+    """Return the pattern itself if it is a plain literal, else None.
+
+    A pattern with no metacharacters matches exactly where the literal
+    occurs, so a C-level substring test can rule a block out before the
+    regex engine is invoked. Flags that change how the pattern text is
+    read disqualify the shortcut: IGNORECASE folds case, VERBOSE makes
+    whitespace insignificant, and LOCALE alters character classes.
+    """
+    if flags & (re.IGNORECASE | re.VERBOSE | re.LOCALE) or not pattern:
+        return None
+    if _RE_SPECIALS.isdisjoint(pattern):
+        return pattern
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _is_ascii_compatible(encoding):
+    """True if ASCII bytes decode to the same characters under 'encoding'."""
+    try:
+        return codecs.lookup(encoding).name in ("utf-8", "ascii", "iso8859-1")
+    except LookupError:
+        return False
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_multiline(pattern, flags):
+    """Compile the MULTILINE variant of a pattern, memoized across instances."""
+    return re.compile(pattern, flags | re.MULTILINE)
+
 
 class GrepText:
     """Grep a single file for a regex by iterating over the lines in a file.
@@ -63,14 +99,41 @@ class GrepText:
     def __init__(self, regex, options=None):
         # The compiled regex.
         self.regex = regex
-        # An equivalent regex with multiline enabled.
-        self.regex_m = re.compile(regex.pattern, regex.flags | re.MULTILINE)
+        # An equivalent regex with multiline enabled. A fixed string has no
+        # anchors, so MULTILINE changes nothing and the searcher is reused.
+        if isinstance(regex, FixedStringPattern):
+            self.regex_m = regex
+        else:
+            self.regex_m = _compile_multiline(regex.pattern, regex.flags)
 
         # The options object from parsing the configuration and command line.
         if options is None:
             options = Options()
         self.options = options
 
+        # For an ASCII fixed string the raw bytes can be tested before paying
+        # for the decode: any ASCII-compatible encoding represents the literal
+        # with exactly those bytes.
+        self._literal_bytes = None
+        if isinstance(regex, FixedStringPattern):
+            try:
+                self._literal_bytes = regex.literal.encode("ascii")
+            except UnicodeEncodeError:
+                pass
+
+        # A literal the pattern cannot match without; blocks that lack it are
+        # dismissed with one substring scan instead of a regex pass. A
+        # FixedStringPattern is already a bare find() loop, so it gets None.
+        if isinstance(regex, FixedStringPattern):
+            self._prefilter = None
+        else:
+            self._prefilter = _required_literal(regex.pattern, regex.flags)
+
+        # Pre-render the ANSI escape prefixes used by report(); the styles
+        # never change for the lifetime of a GrepText instance.
+        self._filename_prefix = style_prefix(**COLOR_STYLE.get("filename", {}))
+        self._searchterm_prefix = style_prefix(**COLOR_STYLE.get("searchterm", {}))
+
     def read_block_with_context(self, prev, fp, fp_size, encoding):
         """Read a block of data from the file, along with some surrounding
         context.
@@ -140,13 +203,14 @@ class GrepText:
             before_start += 1
         before_lines = prev.data[before_start : prev.end]
         # Using readline() to force this block out to a newline boundary...
-        try:
-            curr_block = prev.data[prev.end :] + block_main + ("" if is_last_block else to_str(fp.readline(), encoding))
-        except TypeError as ex:
-            print(ex)
-            print(prev)
-            print(block_main)
-            raise ex
+        # join() pre-sizes the result, so the pieces are copied exactly once.
+        curr_block = "".join(
+            (
+                prev.data[prev.end :],
+                block_main,
+                "" if is_last_block else to_str(fp.readline(), encoding),
+            ),
+        )
         # Read in some lines of 'after' context.
         if is_last_block:
             after_lines = ""
@@ -154,8 +218,10 @@ class GrepText:
             after_lines_list = [to_str(fp.readline(), encoding) for i in range(self.options.after_context)]
             after_lines = "".join(after_lines_list)
 
+        # Every component is already str here (block_main and the readline
+        # results were decoded above), so no further to_str pass is needed.
         result = DataBlock(
-            data=to_str(before_lines + curr_block + after_lines, encoding),
+            data="".join((before_lines, curr_block, after_lines)),
             start=len(before_lines),
             end=len(before_lines) + len(curr_block),
             before_count=before_count,
@@ -193,6 +259,38 @@ class GrepText:
                 else:
                     fp_size = None
 
+        if not self.options.show_match:
+            return self._search_only(fp, fp_size, encoding)
+
+        if fp_size and fp_size <= READ_BLOCKSIZE:
+            # FAST PATH: map the whole regular file and grep it as a single
+            # block. The kernel pages data in on demand, the regex loop runs
+            # uninterrupted over the full body, and the block-boundary context
+            # stitching below is skipped entirely. Capped at one block's worth
+            # of data: the decode below holds the whole file as a str, so
+            # larger files stream through the block loop to keep peak memory
+            # bounded by READ_BLOCKSIZE rather than file size.
+            try:
+                mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                pass
+            else:
+                try:
+                    if self._literal_bytes is not None and _is_ascii_compatible(encoding):
+                        # Cheap negative test on the raw bytes; no occurrence
+                        # there means no occurrence in the decoded text either.
+                        if mm.find(self._literal_bytes) < 0:
+                            return []
+                    try:
+                        data = str(mm, encoding)
+                    except UnicodeDecodeError:
+                        data = str(mm, "latin1")
+                finally:
+                    mm.close()
+                block = DataBlock(data=data, start=0, end=len(data), before_count=0, is_last=True)
+                (_, block_context) = self.do_grep_block(block, 0)
+                return self.uniquify_context(block_context)
+
         block = self.read_block_with_context(None, fp, fp_size, encoding)
         while block.end > block.start:
             (block_line_count, block_context) = self.do_grep_block(block, line_count - block.before_count)
@@ -203,18 +301,61 @@ class GrepText:
             next_block = self.read_block_with_context(block, fp, fp_size, encoding)
             if next_block.end > next_block.start:
                 if block_line_count is None:
-                    # If the file contains N blocks, then in the best case we
-                    # will need to compute line offsets for the first N-1 blocks.
-                    # Most files will fit within a single block, so if there are
-                    # no regex matches then we can typically avoid computing *any*
-                    # line offsets.
-                    (_, block_line_count) = get_line_offsets(block)
+                    # No match in this block, so only the running line count is
+                    # needed; count newlines without building the offsets list.
+                    block_line_count = count_lines(block)
                 line_count += block_line_count
             block = next_block
 
         unique_context = self.uniquify_context(context)
         return unique_context
 
+    def _search_only(self, fp, fp_size, encoding):
+        """Scan for the first hit only, for filename-only reporting.
+
+        report() only checks whether the context list is empty when
+        show_match is off, so line offsets, context and dedup are all
+        skipped; the first hit anywhere decides the outcome.
+        """
+        hit = [(0, MATCH, "", [])]
+        search = self.regex_m.search
+        # The same READ_BLOCKSIZE cap as do_grep's fast path: decoding the
+        # mapping makes a str copy of the whole file.
+        if fp_size and fp_size <= READ_BLOCKSIZE:
+            try:
+                mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                pass
+            else:
+                try:
+                    if self._literal_bytes is not None and _is_ascii_compatible(encoding):
+                        # An ASCII literal can be ruled out on the raw bytes.
+                        # A hit is only decisive without word boundaries: a
+                        # substring occurrence need not be \b-bounded, so -w
+                        # patterns fall through to the boundary-aware search.
+                        if mm.find(self._literal_bytes) < 0:
+                            return []
+                        if not getattr(self.regex, "word", False):
+                            return hit
+                    try:
+                        data = str(mm, encoding)
+                    except UnicodeDecodeError:
+                        data = str(mm, "latin1")
+                finally:
+                    mm.close()
+                return hit if search(data) is not None else []
+
+        block = self.read_block_with_context(None, fp, fp_size, encoding)
+        while block.end > block.start:
+            # Context areas are part of the same file, so any hit in the
+            # block data means the file matches.
+            if search(block.data) is not None:
+                return hit
+            if block.is_last:
+                break
+            block = self.read_block_with_context(block, fp, fp_size, encoding)
+        return []
+
     def do_grep_block(self, block, line_num_offset):
         """Grep a single block of file content.
 
@@ -238,63 +379,71 @@ class GrepText:
         before = self.options.before_context
         after = self.options.after_context
         block_context = []
-        line_offsets = None
         line_count = None
 
-        def build_match_context(match):
-            match_line_num = bisect.bisect(line_offsets, match.start() + block.start) - 1
+        # Cheap rejection first: a block without the required literal cannot
+        # contain a match, and "in" is a single C-level substring scan.
+        body = block.data[block.start : block.end]
+        if self._prefilter is not None and self._prefilter not in body:
+            return (line_count, block_context)
+
+        # Using re.MULTILINE here, so ^ and $ will work as expected. Collect
+        # the matches up front: in the common no-match case we return before
+        # paying for line offsets at all, and otherwise compute them once.
+        matches = list(self.regex_m.finditer(body))
+        if not matches:
+            return (line_count, block_context)
+
+        (line_offsets, line_count) = get_line_offsets(block)
+
+        # Bind the loop invariants as locals; the body below runs once per
+        # match and used to live in a closure allocating three lists each time.
+        append = block_context.append
+        data = block.data
+        offsets = line_offsets
+        block_start = block.start
+        num_lines = len(offsets) - 1
+        prev_line_num = None
+        spans = None
+        for match in matches:
+            start = match.start() + block_start
+            end = match.end() + block_start
+            match_line_num = bisect.bisect(offsets, start) - 1
+            line_start = offsets[match_line_num]
+            line_end = offsets[match_line_num + 1]
+            if match_line_num == prev_line_num:
+                # finditer yields matches in order, so further matches on the
+                # same line arrive consecutively; extend the span list already
+                # attached to the reported MATCH tuple.
+                spans.append((start - line_start, min(end, line_end) - line_start))
+                continue
+            prev_line_num = match_line_num
             before_count = min(before, match_line_num)
-            after_count = min(after, (len(line_offsets) - 1) - match_line_num - 1)
-            match_line = block.data[line_offsets[match_line_num] : line_offsets[match_line_num + 1]]
-            spans = [m.span() for m in self.regex.finditer(match_line)]
-
-            before_ctx = [
-                (
-                    i + line_num_offset,
-                    PRE,
-                    block.data[line_offsets[i] : line_offsets[i + 1]],
-                    None,
-                )
-                for i in range(match_line_num - before_count, match_line_num)
-            ]
-            after_ctx = [
-                (
-                    i + line_num_offset,
-                    POST,
-                    block.data[line_offsets[i] : line_offsets[i + 1]],
-                    None,
-                )
-                for i in range(match_line_num + 1, match_line_num + after_count + 1)
-            ]
-            match_ctx = [(match_line_num + line_num_offset, MATCH, match_line, spans)]
-            return before_ctx + match_ctx + after_ctx
-
-        # Using re.MULTILINE here, so ^ and $ will work as expected.
-        for match in self.regex_m.finditer(block.data[block.start : block.end]):
-            # Computing line offsets is expensive, so we do it lazily.  We don't
-            # take the extra CPU hit unless there's a regex match in the file.
-            if line_offsets is None:
-                (line_offsets, line_count) = get_line_offsets(block)
-            block_context += build_match_context(match)
+            after_count = min(after, num_lines - match_line_num - 1)
+            match_line = data[line_start:line_end]
+            # The outer multiline scan already located this match; translate
+            # its span to line coordinates instead of re-running the regex on
+            # the line (clamping matches that run past the newline).
+            spans = [(start - line_start, min(end, line_end) - line_start)]
+
+            for i in range(match_line_num - before_count, match_line_num):
+                append((i + line_num_offset, PRE, data[offsets[i] : offsets[i + 1]], None))
+            append((match_line_num + line_num_offset, MATCH, match_line, spans))
+            for i in range(match_line_num + 1, match_line_num + after_count + 1):
+                append((i + line_num_offset, POST, data[offsets[i] : offsets[i + 1]], None))
 
         return (line_count, block_context)
 
     def uniquify_context(self, context):
         """Remove duplicate lines from the list of context lines."""
-        context.sort()
-        unique_context = []
-        for group in itertools.groupby(context, lambda ikl: ikl[0]):
-            for i, kind, line, matches in group[1]:
-                if kind == MATCH:
-                    # Always use a match.
-                    unique_context.append((i, kind, line, matches))
-                    break
-            else:
-                # No match, only PRE and/or POST lines. Use the last one, which
-                # should be a POST since we've sorted it that way.
-                unique_context.append((i, kind, line, matches))
-
-        return unique_context
+        # One dict pass instead of sort + groupby: a MATCH always wins its
+        # line number; among plain context lines POST beats PRE.
+        seen = {}
+        for item in context:
+            cur = seen.get(item[0])
+            if cur is None or (cur[1] != MATCH and (item[1] == MATCH or item[1] >= cur[1])):
+                seen[item[0]] = item
+        return [seen[i] for i in sorted(seen)]
 
     def report(self, context_lines, filename=None):
         """Return a string showing the results.
@@ -315,35 +464,42 @@ class GrepText:
         """
         if len(context_lines) == 0:
             return ""
+        # Options is a dict; hoist the repeated attribute lookups out of the
+        # per-line loop.
+        options = self.options
+        use_color = options.use_color
         lines = []
-        if not self.options.show_match:
+        if not options.show_match:
             # Just show the filename if we match.
             line = "%s\n" % filename
             lines.append(line)
         else:
-            if self.options.show_filename and filename is not None and not self.options.show_emacs:
+            if options.show_filename and filename is not None and not options.show_emacs:
                 line = "%s:\n" % filename
-                if self.options.use_color:
-                    line = colorize(line, **COLOR_STYLE.get("filename", {}))
+                if use_color:
+                    line = "{}{}{}".format(self._filename_prefix, line, STYLE_END)
                 lines.append(line)
-            if self.options.show_emacs:
+            if options.show_emacs:
                 template = "%(filename)s:%(lineno)s: %(line)s"
-            elif self.options.show_line_numbers:
+            elif options.show_line_numbers:
                 template = "%(lineno)5s %(sep)s %(line)s"
             else:
                 template = "%(line)s"
             for i, kind, line, spans in context_lines:
-                if self.options.use_color and kind == MATCH and "searchterm" in COLOR_STYLE:
-                    style = COLOR_STYLE["searchterm"]
-                    orig_line = line[:]
-                    total_offset = 0
+                if use_color and kind == MATCH and "searchterm" in COLOR_STYLE:
+                    # Walk the spans left to right collecting parts, then join
+                    # once; rebuilding the line per span is quadratic.
+                    prefix = self._searchterm_prefix
+                    parts = []
+                    last = 0
                     for start, end in spans:
-                        old_substring = orig_line[start:end]
-                        start += total_offset
-                        end += total_offset
-                        color_substring = colorize(old_substring, **style)
-                        line = line[:start] + color_substring + line[end:]
-                        total_offset += len(color_substring) - len(old_substring)
+                        parts.append(line[last:start])
+                        parts.append(prefix)
+                        parts.append(line[start:end])
+                        parts.append(STYLE_END)
+                        last = end
+                    parts.append(line[last:])
+                    line = "".join(parts)
 
                 ns = dict(
                     lineno=i + 1,
@@ -383,6 +539,13 @@ class GrepText:
         else:
             # Always open in binary mode
             f = opener(filename, "rb")
+            # Advisory only: prime the kernel readahead for the sequential
+            # scan. In-memory streams have no fileno and are skipped.
+            try:
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            except (AttributeError, OSError):
+                pass
         try:
             unique_context = self.do_grep(f, encoding)
         finally:
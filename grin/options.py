@@ -39,6 +39,7 @@ class Options(dict):
         self.setdefault("show_match", True)
         self.setdefault("show_filename", True)
         self.setdefault("show_emacs", False)
+        self.setdefault("use_color", False)
         self.setdefault("skip_hidden_dirs", False)
         self.setdefault("skip_backup_files", True)
         self.setdefault("skip_hidden_files", False)
@@ -26,9 +26,13 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import fnmatch
-import gzip
+import functools
+import mmap
 import os
+import re
 import stat
+import zlib
+from operator import attrgetter
 
 from .utils import is_binary_string
 
@@ -37,6 +41,34 @@ __all__ = ["FileRecognizer", "get_recognizer"]
 # gzip magic header bytes.
 GZIP_MAGIC = b"\037\213"
 
+# Flags for raw probe reads; O_CLOEXEC where the platform has it.
+_O_PROBE = os.O_RDONLY | getattr(os, "O_CLOEXEC", 0)
+
+# On case-sensitive filesystems os.path.normcase() is an identity function
+# that still costs a call per file; detect that once at import time.
+_NORMCASE_IS_NOOP = os.path.normcase("Aa") == "Aa"
+
+
+def _splitext_fast(filename):
+    """Return the extension of `filename` as os.path.splitext() would.
+
+    splitext() builds and throws away the root component; only the extension
+    is needed here, so two rfinds suffice. Dotfiles such as ".bashrc" still
+    report no extension.
+    """
+    sep = filename.rfind(os.sep)
+    if os.altsep:
+        sep = max(sep, filename.rfind(os.altsep))
+    dot = filename.rfind(".")
+    if dot <= sep:
+        # No dot inside the basename; dots in directory components don't count.
+        return ""
+    # The extension only counts when a non-dot character precedes the dot
+    # within the basename.
+    if filename[sep + 1 : dot].lstrip("."):
+        return filename[dot:]
+    return ""
+
 
 class FileRecognizer:
     """Configurable way to determine what kind of file something is.
@@ -69,8 +101,8 @@ class FileRecognizer:
         self,
         skip_hidden_dirs=False,
         skip_hidden_files=False,
-        skip_dirs=set(),
-        skip_exts=set(),
+        skip_dirs=None,
+        skip_exts=None,
         skip_symlink_dirs=True,
         skip_symlink_files=True,
         binary_bytes=4096,
@@ -78,24 +110,31 @@ class FileRecognizer:
     ):
         self.skip_hidden_dirs = skip_hidden_dirs
         self.skip_hidden_files = skip_hidden_files
-        self.skip_dirs = skip_dirs
+        # Freeze for fast O(1) membership tests in the per-entry hot path.
+        self.skip_dirs = frozenset(skip_dirs or ())
 
         # For speed, split extensions into the simple ones, that are
         # compatible with os.path.splitext and hence can all be
         # checked for in a single set-lookup, and the weirdos that
         # can't and therefore must be checked for one at a time.
-        self.skip_exts_simple = set()
-        self.skip_exts_endswith = list()
-        for ext in skip_exts:
+        skip_exts_simple = set()
+        skip_exts_endswith = []
+        for ext in skip_exts or ():
             if os.path.splitext("foo.bar" + ext)[1] == ext:
-                self.skip_exts_simple.add(ext)
+                skip_exts_simple.add(ext)
             else:
-                self.skip_exts_endswith.append(ext)
+                skip_exts_endswith.append(ext)
+        self.skip_exts_simple = frozenset(skip_exts_simple)
+        # str.endswith accepts a tuple and checks every suffix in one C call.
+        self.skip_exts_endswith = tuple(skip_exts_endswith)
 
         self.skip_symlink_dirs = skip_symlink_dirs
         self.skip_symlink_files = skip_symlink_files
         self.binary_bytes = binary_bytes
         self.include = include
+        # fnmatch.fnmatch() retranslates its pattern on every call; compiling
+        # the translated regex once here leaves only a match() per file.
+        self._include_match = re.compile(fnmatch.translate(os.path.normcase(include))).match if include else None
 
     def is_binary(self, filename):
         """Determine if a given file is binary or not.
@@ -108,8 +147,24 @@ class FileRecognizer:
         -------
         is_binary : bool
         """
-        with open(filename, "rb") as fp:
-            return self._is_binary_file(fp)
+        if self.binary_bytes >= 65536:
+            # For large probes a read-only mapping skips the kernel-to-user
+            # copy; for the default 4KiB probe a plain read is cheaper than
+            # setting up a mapping.
+            try:
+                with open(filename, "rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return is_binary_string(mm[: self.binary_bytes])
+            except ValueError:
+                # Zero-length or unmappable; use the read path below.
+                pass
+        # A raw file descriptor read; open() would build a FileIO plus a
+        # BufferedReader per probe, which adds up over millions of files.
+        fd = os.open(filename, _O_PROBE)
+        try:
+            data = os.read(fd, self.binary_bytes)
+        finally:
+            os.close(fd)
+        return is_binary_string(data)
 
     def _is_binary_file(self, f):
         """Determine if a given filelike object has binary data or not.
@@ -130,7 +185,28 @@ class FileRecognizer:
             return True
         return is_binary_string(data)
 
-    def is_gzipped_text(self, filename):
+    def _classify(self, filename):
+        """Classify file content as 'text', 'binary' or 'gzip' with one read.
+
+        The old text/binary/gzip decision opened the file up to three times;
+        here the probe buffer is read once and the gzip magic is checked from
+        the same bytes, so only real gzip candidates pay for a decompression
+        probe.
+        """
+        fd = os.open(filename, _O_PROBE)
+        try:
+            try:
+                data = os.read(fd, self.binary_bytes)
+            except OSError:
+                # Looks corrupt; treat like any other unprintable content.
+                return "binary"
+        finally:
+            os.close(fd)
+        if data[:2] == GZIP_MAGIC:
+            return "gzip" if self.is_gzipped_text(filename, magic=data) else "binary"
+        return "binary" if is_binary_string(data) else "text"
+
+    def is_gzipped_text(self, filename, magic=None):
         """Determine if a given file is a gzip-compressed text file or not.
 
         If the uncompressed file is binary and not text, then this will return
@@ -139,24 +215,35 @@ class FileRecognizer:
         Parameters
         ----------
         filename : str
+        magic : bytes, optional
+            Bytes already read from the start of the file; when given, the
+            marker re-read is skipped.
 
         Returns
         -------
         is_gzipped_text : bool
         """
-        is_gzipped_text = False
-        with open(filename, "rb") as fp:
-            marker = fp.read(2)
-
-        if marker == GZIP_MAGIC:
-            with gzip.open(filename) as fp:
-                try:
-                    is_gzipped_text = not self._is_binary_file(fp)
-                except IOError:
-                    # We saw the GZIP_MAGIC marker, but it is not actually a gzip
-                    # file.
-                    is_gzipped_text = False
-        return is_gzipped_text
+        if magic is None:
+            with open(filename, "rb") as fp:
+                magic = fp.read(2)
+        if magic[:2] != GZIP_MAGIC:
+            return False
+
+        # Inflate at most binary_bytes of output from one bounded read of the
+        # compressed stream; gzip.open() would reopen the file, build a
+        # GzipFile, and decompress through its own buffering.
+        fd = os.open(filename, _O_PROBE)
+        try:
+            raw = os.read(fd, 65536)
+        finally:
+            os.close(fd)
+        try:
+            data = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(raw, self.binary_bytes)
+        except zlib.error:
+            # We saw the GZIP_MAGIC marker, but it is not actually a gzip
+            # file.
+            return False
+        return not is_binary_string(data)
 
     def recognize(self, filename, direntry):
         """Determine what kind of thing a filename represents.
@@ -218,8 +305,10 @@ class FileRecognizer:
 
     def recognize_directory(self, filename, direntry):
         """Determine what to do with a directory."""
-        basename = os.path.split(filename)[-1]
-        if self.skip_hidden_dirs and basename.startswith(".") and basename not in (".", ".."):
+        basename = direntry.name if direntry is not None else os.path.split(filename)[-1]
+        # basename[:1] is a plain slice compare; startswith() would go
+        # through method dispatch for every entry.
+        if self.skip_hidden_dirs and basename[:1] == "." and basename not in (".", ".."):
             return "skip"
         if self.skip_symlink_dirs:
             if direntry is None:
@@ -234,9 +323,19 @@ class FileRecognizer:
 
     def recognize_file(self, filename, direntry):
         """Determine what to do with a file."""
-        basename = os.path.split(filename)[-1]
-        if self.skip_hidden_files and basename.startswith("."):
+        basename = direntry.name if direntry is not None else os.path.split(filename)[-1]
+        if self.skip_hidden_files and basename[:1] == ".":
             return "skip"
+
+        # Test the name-based skip rules before the symlink check: they only
+        # need string work, while the symlink check may cost an lstat().
+        filename_nc = filename if _NORMCASE_IS_NOOP else os.path.normcase(filename)
+        ext = _splitext_fast(filename_nc)
+        if ext in self.skip_exts_simple or ext.startswith(".~"):
+            return "skip"
+        if self.skip_exts_endswith and filename_nc.endswith(self.skip_exts_endswith):
+            return "skip"
+
         if self.skip_symlink_files:
             if direntry is None:
                 if os.path.islink(filename):
@@ -245,25 +344,12 @@ class FileRecognizer:
                 if direntry.is_symlink():
                     return "link"
 
-        if self.include is not None:
-            if not fnmatch.fnmatch(basename, self.include):
+        if self._include_match is not None:
+            if self._include_match(os.path.normcase(basename)) is None:
                 return "skip"
 
-        filename_nc = os.path.normcase(filename)
-        ext = os.path.splitext(filename_nc)[1]
-        if ext in self.skip_exts_simple or ext.startswith(".~"):
-            return "skip"
-        for ext in self.skip_exts_endswith:
-            if filename_nc.endswith(ext):
-                return "skip"
         try:
-            if self.is_binary(filename):
-                if self.is_gzipped_text(filename):
-                    return "gzip"
-                else:
-                    return "binary"
-            else:
-                return "text"
+            return self._classify(filename)
         except (OSError, IOError):
             return "unreadable"
 
@@ -283,27 +369,61 @@ class FileRecognizer:
         filename : str
         kind : str
         """
-        kind = self.recognize(startpath, direntry)
-        if kind in ("binary", "text", "gzip"):
-            yield startpath, kind
-            # Not a directory, so there is no need to recurse.
-            return
-        elif kind == "directory":
-            try:
-                entries = os.scandir(startpath)
-            except OSError:
-                return
-            for entry in sorted(entries, key=lambda e: e.name):
-                path = os.path.join(startpath, entry.name)
-                for fn, k in self.walk(path, entry):
-                    yield fn, k
+        # Iterative depth-first traversal: an explicit LIFO stack replaces one
+        # Python frame per directory. Children are pushed in reverse sorted
+        # order so they pop in the same order the recursion used to yield.
+        stack = [(startpath, direntry)]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            path, entry = pop()
+            kind = self.recognize(path, entry)
+            if kind in ("binary", "text", "gzip"):
+                yield path, kind
+            elif kind == "directory":
+                try:
+                    # attrgetter runs in C; a lambda key would re-enter the
+                    # interpreter once per comparison. sorted() exhausts the
+                    # scandir iterator, which releases its directory
+                    # descriptor; the explicit close covers the error path on
+                    # 3.6+ (3.5 has neither close() nor the context manager,
+                    # so it falls back to GC there).
+                    entries = os.scandir(path)
+                    try:
+                        children = sorted(entries, key=attrgetter("name"), reverse=True)
+                    finally:
+                        close = getattr(entries, "close", None)
+                        if close is not None:
+                            close()
+                except OSError:
+                    continue
+                for child in children:
+                    # child.path is precomputed by scandir; same value that
+                    # os.path.join(path, child.name) would build.
+                    push((child.path, child))
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_recognizer(skip_hidden_files, skip_hidden_dirs, skip_dirs, skip_exts, skip_symlinks, include):
+    return FileRecognizer(
+        skip_hidden_files=skip_hidden_files,
+        skip_hidden_dirs=skip_hidden_dirs,
+        skip_dirs=skip_dirs,
+        skip_exts=skip_exts,
+        skip_symlink_files=skip_symlinks,
+        skip_symlink_dirs=skip_symlinks,
+        include=include,
+    )
 
 
 def get_recognizer(args):
     """Get the file recognizer object from the configured options."""
 
-    # always convert to set
-    skip_dirs = set([x for x in args.skip_dirs.split(",") if x] if isinstance(args.skip_dirs, str) else args.skip_dirs)
+    # always convert to set; split the comma-separated command line form once
+    # here rather than deeper inside the walk
+    skip_dirs = frozenset(
+        [x for x in args.skip_dirs.split(",") if x] if isinstance(args.skip_dirs, str) else args.skip_dirs,
+    )
     skip_exts = set([x for x in args.skip_exts.split(",") if x] if isinstance(args.skip_exts, str) else args.skip_exts)
 
     # handle deprecated --[no-]-skip-backup-files option
@@ -315,12 +435,13 @@ def get_recognizer(args):
         except KeyError:
             pass
 
-    return FileRecognizer(
-        skip_hidden_files=args.skip_hidden_files,
-        skip_hidden_dirs=args.skip_hidden_dirs,
-        skip_dirs=skip_dirs,
-        skip_exts=skip_exts,
-        skip_symlink_files=not args.follow_symlinks,
-        skip_symlink_dirs=not args.follow_symlinks,
-        include=getattr(args, "include", None),
+    # The recognizer itself is stateless, so identical configurations can
+    # share an instance; the normalized frozensets make a hashable cache key.
+    return _cached_recognizer(
+        args.skip_hidden_files,
+        args.skip_hidden_dirs,
+        skip_dirs,
+        frozenset(skip_exts),
+        not args.follow_symlinks,
+        getattr(args, "include", None),
     )
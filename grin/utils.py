@@ -25,19 +25,30 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-import argparse
+import functools
 import re
 import sys
 
-__all__ = ["get_line_offsets", "get_regex", "is_binary_string", "to_str"]
+__all__ = ["FixedStringPattern", "count_lines", "get_line_offsets", "get_regex", "is_binary_string", "to_str"]
 
 
 # Use file(1)'s choices for what's text and what's not.
 TEXTCHARS = bytes([7, 8, 9, 10, 12, 13, 27] + list(range(0x20, 0x100)))
-ALLBYTES = bytes(range(256))
+
+# Signature prefixes that settle the text/binary question without scanning the
+# whole probe buffer: a UTF-8 byte-order mark can only start a text file, while
+# these magic numbers mark well-known binary container formats.
+UTF8_BOM = b"\xef\xbb\xbf"
+BINARY_MAGICS = (
+    b"\x7fELF",  # ELF executables and shared objects
+    b"\x89PNG",  # PNG images
+    b"PK\x03\x04",  # zip archives (also jar, whl, docx, ...)
+)
 
 
 def deprecate_option(msg):
+    import argparse
+
     return msg if "--help-verbose" in sys.argv else argparse.SUPPRESS
 
 
@@ -61,8 +72,27 @@ def is_binary_string(bytes):
     -------
     is_binary : bool
     """
-    nontext = bytes.translate(ALLBYTES, TEXTCHARS)
-    return bool(nontext)
+    if bytes.startswith(UTF8_BOM):
+        return False
+    if bytes.startswith(BINARY_MAGICS):
+        return True
+    # Most binary data contains a NUL early on, and the membership test is a
+    # plain memchr scan with no allocation.
+    if b"\x00" in bytes:
+        return True
+    # Passing None as the table skips the identity mapping and only deletes.
+    return bool(bytes.translate(None, TEXTCHARS))
+
+
+def count_lines(block):
+    """Count the lines inside [block.start, block.end) only.
+
+    Unlike get_line_offsets() this never builds the offsets list; it is a
+    single C-level count, for callers that just advance a line counter.
+    """
+    if block.line_offsets is not None:
+        return block.line_offsets[1]
+    return block.data.count("\n", block.start, block.end)
 
 
 def get_line_offsets(block):
@@ -71,25 +101,120 @@ def get_line_offsets(block):
 
     Returns: (offset list, count of lines in "current block")
     """
+    # A block's data is immutable, so the result of the first scan is cached
+    # on the block and handed back to any later caller.
+    if block.line_offsets is not None:
+        return block.line_offsets
+    # Block data is always str in this tree: read_block_with_context and the
+    # mmap fast path both decode before building a DataBlock.
+    s = block.data
+    newline = "\n"
     # Note: this implementation based on string.find() benchmarks about twice as
     # fast as a list comprehension using re.finditer().
     line_offsets = [0]
-    line_count = 0  # Count of lines inside range [block.start, block.end) *only*
-    s = block.data
+    append = line_offsets.append
+    find = s.find
+    pos = 0
     while True:
-        next_newline = s.find("\n", line_offsets[-1])
+        next_newline = find(newline, pos)
         if next_newline < 0:
-            # Tack on a final "line start" corresponding to EOF, if not done already.
-            # This makes it possible to determine the length of each line by computing
-            # a difference between successive elements.
-            if line_offsets[-1] < len(s):
-                line_offsets.append(len(s))
-            return (line_offsets, line_count)
-        else:
-            line_offsets.append(next_newline + 1)
-            # Keep track of the count of lines within the "current block"
-            if next_newline >= block.start and next_newline < block.end:
-                line_count += 1
+            break
+        pos = next_newline + 1
+        append(pos)
+    # Tack on a final "line start" corresponding to EOF, if not done already.
+    # This makes it possible to determine the length of each line by computing
+    # a difference between successive elements.
+    if line_offsets[-1] < len(s):
+        append(len(s))
+    # Count of lines inside range [block.start, block.end) *only*. A single
+    # C-level scan is much cheaper than range-testing every offset in Python.
+    line_count = s.count(newline, block.start, block.end)
+    block.line_offsets = (line_offsets, line_count)
+    return block.line_offsets
+
+
+class _LiteralMatch:
+    """Just enough of the re.Match interface for GrepText's span handling."""
+
+    def __init__(self, start, end):
+        self._start = start
+        self._end = end
+
+    def start(self):
+        return self._start
+
+    def end(self):
+        return self._end
+
+    def span(self):
+        return (self._start, self._end)
+
+
+def _is_word_char(ch):
+    """True for characters that \\b treats as part of a word."""
+    return ch == "_" or ch.isalnum()
+
+
+class FixedStringPattern:
+    """Searcher for a fixed string exposing a subset of the re.Pattern API.
+
+    Scanning is done with C-level str.find, which beats the regex engine by a
+    wide margin for plain literals. The pattern/flags attributes let the
+    object be passed anywhere a compiled regex for the escaped literal would
+    be. With word=True each hit is additionally required to sit on \\b
+    boundaries, checked with two character tests instead of the regex engine.
+    """
+
+    def __init__(self, literal, flags=0, word=False):
+        self.literal = literal
+        self.pattern = r"\b" + re.escape(literal) + r"\b" if word else re.escape(literal)
+        self.flags = flags
+        self.word = word
+
+    def _at_word_boundaries(self, s, start, end):
+        return (start == 0 or not _is_word_char(s[start - 1])) and (end == len(s) or not _is_word_char(s[end]))
+
+    def finditer(self, s):
+        literal = self.literal
+        width = len(literal)
+        find = s.find
+        pos = find(literal)
+        while pos >= 0:
+            end = pos + width
+            if not self.word or self._at_word_boundaries(s, pos, end):
+                yield _LiteralMatch(pos, end)
+                pos = find(literal, end)
+            else:
+                pos = find(literal, pos + 1)
+
+    def search(self, s, pos=0):
+        width = len(self.literal)
+        find = s.find
+        index = find(self.literal, pos)
+        while index >= 0:
+            end = index + width
+            if not self.word or self._at_word_boundaries(s, index, end):
+                return _LiteralMatch(index, end)
+            index = find(self.literal, index + 1)
+        return None
+
+
+@functools.lru_cache(maxsize=32)
+def _compile(regex, flags, fixed_string, word_regexp):
+    if fixed_string and not flags & re.IGNORECASE and regex:
+        # A plain literal (no case folding) does not need the regex engine at
+        # all. With -w the find() loop still applies when the literal starts
+        # and ends with word characters, where \b reduces to two neighbor
+        # checks; other literals fall through to re, whose \b semantics at
+        # non-word edges are subtler.
+        if not word_regexp:
+            return FixedStringPattern(regex, flags)
+        if _is_word_char(regex[0]) and _is_word_char(regex[-1]):
+            return FixedStringPattern(regex, flags, word=True)
+    pattern = re.escape(regex) if fixed_string else regex
+    if word_regexp:
+        pattern = r"\b" + pattern + r"\b"
+    return re.compile(pattern, flags)
 
 
 def get_regex(args):
@@ -98,7 +223,6 @@ def get_regex(args):
     flags = 0
     for flag in args.re_flags:
         flags |= flag
-    pattern = re.escape(args.regex) if args.fixed_string else args.regex
-    if args.word_regexp:
-        pattern = r"\b" + pattern + r"\b"
-    return re.compile(pattern, flags)
+    # Memoized so that repeated calls with the same configuration (e.g. from
+    # a long-lived process driving grin programmatically) compile only once.
+    return _compile(args.regex, flags, args.fixed_string, args.word_regexp)
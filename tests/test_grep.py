@@ -173,262 +173,197 @@ gzip_text_compressed = gzip_buffer.getvalue()
 gzip_text_compressed_trailing_garbage = gzip_text_compressed + b"\narborist\ncompetitive\n"
 
 
-class GrepTestCase(TestCase):
-    def test_non_ascii(self):
-        non_ascii = grin.GrepText(re.compile("é"))
-        self.assertEqual(
-            non_ascii.do_grep(BytesIO(utf_8_foo), encoding="utf8"),
-            [(0, 0, "Rémy\n", [(1, 2)])],
-        )
-        self.assertEqual(
-            non_ascii.do_grep(BytesIO(latin_1_foo), encoding="latin1"),
-            [(0, 0, "Rémy\n", [(1, 2)])],
-        )
+def _buf(payload, _cache={}):
+    """Return a shared, rewound BytesIO over one of the fixture constants.
 
-        self.assertEqual(non_ascii.do_grep(BytesIO(utf_8_foo), encoding="latin1"), [])
+    do_grep only reads the stream, so one BytesIO per fixture plus a seek(0)
+    replaces a fresh allocation per call.
+    """
+    stream = _cache.get(id(payload))
+    if stream is None:
+        stream = _cache[id(payload)] = BytesIO(payload)
+    stream.seek(0)
+    return stream
 
-        # Fallback to latin1
-        self.assertEqual(
-            non_ascii.do_grep(BytesIO(latin_1_foo), encoding="utf8"),
-            [(0, 0, "Rémy\n", [(1, 2)])],
-        )
 
-    def test_basic_defaults(self):
-        # Test the basic defaults, no context.
-        gt_default = grin.GrepText(re.compile("foo"))
-        self.assertEqual(
-            gt_default.do_grep(BytesIO(all_foo)),
-            [
-                (0, 0, "foo\n", [(0, 3)]),
-                (1, 0, "foo\n", [(0, 3)]),
-                (2, 0, "foo\n", [(0, 3)]),
-                (3, 0, "foo\n", [(0, 3)]),
-                (4, 0, "foo\n", [(0, 3)]),
-            ],
-        )
-        self.assertEqual(gt_default.do_grep(BytesIO(first_foo)), [(0, 0, "foo\n", [(0, 3)])])
-        self.assertEqual(gt_default.do_grep(BytesIO(last_foo)), [(4, 0, "foo\n", [(0, 3)])])
-        self.assertEqual(gt_default.do_grep(BytesIO(second_foo)), [(1, 0, "foo\n", [(0, 3)])])
-        self.assertEqual(gt_default.do_grep(BytesIO(second_last_foo)), [(3, 0, "foo\n", [(0, 3)])])
-        self.assertEqual(gt_default.do_grep(BytesIO(middle_foo)), [(2, 0, "foo\n", [(0, 3)])])
-        self.assertEqual(
-            gt_default.do_grep(BytesIO(small_gap)),
-            [(2, 0, "foo\n", [(0, 3)]), (4, 0, "foo\n", [(0, 3)])],
-        )
-        self.assertEqual(gt_default.do_grep(BytesIO(no_eol)), [(0, 0, "foo", [(0, 3)])])
-        self.assertEqual(
-            gt_default.do_grep(BytesIO(middle_of_line)),
-            [(2, 0, "barfoobar\n", [(3, 6)])],
-        )
+# The buffers the context sweep runs over, keyed by the names used in
+# _CONTEXT_CASES.
+_CONTEXT_FIXTURES = {
+    "all_foo": all_foo,
+    "first_foo": first_foo,
+    "last_foo": last_foo,
+    "second_foo": second_foo,
+    "second_last_foo": second_last_foo,
+    "middle_foo": middle_foo,
+    "small_gap": small_gap,
+    "no_eol": no_eol,
+    "middle_of_line": middle_of_line,
+}
 
-    def test_symmetric_one_line_context(self):
-        # Symmetric 1-line context.
 
-        gt_context_1 = grin.GrepText(re.compile("foo"), options=grin.Options(before_context=1, after_context=1))
-        self.assertEqual(
-            gt_context_1.do_grep(BytesIO(all_foo)),
-            [
-                (0, 0, "foo\n", [(0, 3)]),
-                (1, 0, "foo\n", [(0, 3)]),
-                (2, 0, "foo\n", [(0, 3)]),
-                (3, 0, "foo\n", [(0, 3)]),
-                (4, 0, "foo\n", [(0, 3)]),
-            ],
-        )
-        self.assertEqual(
-            gt_context_1.do_grep(BytesIO(first_foo)),
-            [(0, 0, "foo\n", [(0, 3)]), (1, 1, "bar\n", None)],
-            # [(1, 0, "foo\n", [(0, 3)]), (2, 1, "bar\n", None)],
-        )
-        self.assertEqual(
-            gt_context_1.do_grep(BytesIO(last_foo)),
-            [(3, -1, "bar\n", None), (4, 0, "foo\n", [(0, 3)])],
-            # [(4, -1, "bar\n", None), (5, 0, "foo\n", [(0, 3)])],
-        )
-        self.assertEqual(
-            gt_context_1.do_grep(BytesIO(second_foo)),
-            [(0, -1, "bar\n", None), (1, 0, "foo\n", [(0, 3)]), (2, 1, "bar\n", None)],
-            # [(1, -1, "bar\n", None), (2, 0, "foo\n", [(0, 3)]), (3, 1, "bar\n", None)],
-        )
-        self.assertEqual(
-            gt_context_1.do_grep(BytesIO(second_last_foo)),
-            [(2, -1, "bar\n", None), (3, 0, "foo\n", [(0, 3)]), (4, 1, "bar\n", None)],
-            # [(3, -1, "bar\n", None), (4, 0, "foo\n", [(0, 3)]), (5, 1, "bar\n", None)],
-        )
-        self.assertEqual(
-            gt_context_1.do_grep(BytesIO(middle_foo)),
-            [(1, -1, "bar\n", None), (2, 0, "foo\n", [(0, 3)]), (3, 1, "bar\n", None)],
-            # [(2, -1, "bar\n", None), (3, 0, "foo\n", [(0, 3)]), (4, 1, "bar\n", None)],
-        )
-        self.assertEqual(
-            gt_context_1.do_grep(BytesIO(small_gap)),
-            [
-                (1, -1, "bar\n", None),
-                (2, 0, "foo\n", [(0, 3)]),
-                (3, 1, "bar\n", None),
-                (4, 0, "foo\n", [(0, 3)]),
-                (5, 1, "bar\n", None),
-            ],
-        )
-        self.assertEqual(gt_context_1.do_grep(BytesIO(no_eol)), [(0, 0, "foo", [(0, 3)])])
-        self.assertEqual(
-            gt_context_1.do_grep(BytesIO(middle_of_line)),
-            [(1, -1, "bar\n", None), (2, 0, "barfoobar\n", [(3, 6)]), (3, 1, "bar\n", None)],
-        )
+def _foo(lineno):
+    """The MATCH tuple for a plain "foo" line."""
+    return (lineno, 0, "foo\n", [(0, 3)])
 
-    def test_symmetric_two_line_context(self):
-        # Symmetric 2-line context.
 
-        gt_context_2 = grin.GrepText(re.compile("foo"), options=grin.Options(before_context=2, after_context=2))
-        self.assertEqual(
-            gt_context_2.do_grep(BytesIO(all_foo)),
-            [
-                (0, 0, "foo\n", [(0, 3)]),
-                (1, 0, "foo\n", [(0, 3)]),
-                (2, 0, "foo\n", [(0, 3)]),
-                (3, 0, "foo\n", [(0, 3)]),
-                (4, 0, "foo\n", [(0, 3)]),
-            ],
-        )
-        self.assertEqual(
-            gt_context_2.do_grep(BytesIO(first_foo)),
-            [(0, 0, "foo\n", [(0, 3)]), (1, 1, "bar\n", None), (2, 1, "bar\n", None)],
-        )
-        self.assertEqual(
-            gt_context_2.do_grep(BytesIO(last_foo)),
-            [(2, -1, "bar\n", None), (3, -1, "bar\n", None), (4, 0, "foo\n", [(0, 3)])],
-        )
-        self.assertEqual(
-            gt_context_2.do_grep(BytesIO(second_foo)),
-            [(0, -1, "bar\n", None), (1, 0, "foo\n", [(0, 3)]), (2, 1, "bar\n", None), (3, 1, "bar\n", None)],
-        )
-        self.assertEqual(
-            gt_context_2.do_grep(BytesIO(second_last_foo)),
-            [(1, -1, "bar\n", None), (2, -1, "bar\n", None), (3, 0, "foo\n", [(0, 3)]), (4, 1, "bar\n", None)],
-        )
-        self.assertEqual(
-            gt_context_2.do_grep(BytesIO(middle_foo)),
-            [
-                (0, -1, "bar\n", None),
-                (1, -1, "bar\n", None),
-                (2, 0, "foo\n", [(0, 3)]),
-                (3, 1, "bar\n", None),
-                (4, 1, "bar\n", None),
-            ],
-        )
-        self.assertEqual(
-            gt_context_2.do_grep(BytesIO(small_gap)),
-            [
-                (0, -1, "bar\n", None),
-                (1, -1, "bar\n", None),
-                (2, 0, "foo\n", [(0, 3)]),
-                (3, 1, "bar\n", None),
-                (4, 0, "foo\n", [(0, 3)]),
-                (5, 1, "bar\n", None),
-                (6, 1, "bar\n", None),
-            ],
-        )
-        self.assertEqual(gt_context_2.do_grep(BytesIO(no_eol)), [(0, 0, "foo", [(0, 3)])])
-        self.assertEqual(
-            gt_context_2.do_grep(BytesIO(middle_of_line)),
-            [
-                (0, -1, "bar\n", None),
-                (1, -1, "bar\n", None),
-                (2, 0, "barfoobar\n", [(3, 6)]),
-                (3, 1, "bar\n", None),
-                (4, 1, "bar\n", None),
-            ],
-        )
+def _bar(lineno, kind):
+    """A context tuple (PRE is -1, POST is 1) for a "bar" line."""
+    return (lineno, kind, "bar\n", None)
 
-    def test_one_line_before_no_lines_after(self):
-        # 1 line of before-context, no lines after.
 
-        gt_before_context_1 = grin.GrepText(re.compile("foo"), options=grin.Options(before_context=1, after_context=0))
-        self.assertEqual(
-            gt_before_context_1.do_grep(BytesIO(all_foo)),
-            [
-                (0, 0, "foo\n", [(0, 3)]),
-                (1, 0, "foo\n", [(0, 3)]),
-                (2, 0, "foo\n", [(0, 3)]),
-                (3, 0, "foo\n", [(0, 3)]),
-                (4, 0, "foo\n", [(0, 3)]),
-            ],
-        )
-        self.assertEqual(gt_before_context_1.do_grep(BytesIO(first_foo)), [(0, 0, "foo\n", [(0, 3)])])
-        self.assertEqual(
-            gt_before_context_1.do_grep(BytesIO(last_foo)),
-            [(3, -1, "bar\n", None), (4, 0, "foo\n", [(0, 3)])],
-        )
-        self.assertEqual(
-            gt_before_context_1.do_grep(BytesIO(second_foo)),
-            [(0, -1, "bar\n", None), (1, 0, "foo\n", [(0, 3)])],
-        )
-        self.assertEqual(
-            gt_before_context_1.do_grep(BytesIO(second_last_foo)),
-            [(2, -1, "bar\n", None), (3, 0, "foo\n", [(0, 3)])],
-        )
-        self.assertEqual(
-            gt_before_context_1.do_grep(BytesIO(middle_foo)),
-            [(1, -1, "bar\n", None), (2, 0, "foo\n", [(0, 3)])],
-        )
-        self.assertEqual(
-            gt_before_context_1.do_grep(BytesIO(small_gap)),
-            [(1, -1, "bar\n", None), (2, 0, "foo\n", [(0, 3)]), (3, -1, "bar\n", None), (4, 0, "foo\n", [(0, 3)])],
-        )
-        self.assertEqual(gt_before_context_1.do_grep(BytesIO(no_eol)), [(0, 0, "foo", [(0, 3)])])
-        self.assertEqual(
-            gt_before_context_1.do_grep(BytesIO(middle_of_line)),
-            [(1, -1, "bar\n", None), (2, 0, "barfoobar\n", [(3, 6)])],
-        )
+# Every configuration reports the all-matches fixture identically.
+_ALL_FOO = [_foo(i) for i in range(5)]
 
-    def test_one_line_after_context_no_lines_before(self):
-        # 1 line of after-context, no lines before.
+# Patterns shared across test methods, compiled once at import.
+_RE_FOO = re.compile("foo")
+_RE_EACUTE = re.compile("é")
+_RE_NI = re.compile("ni")
+_RE_AR = re.compile("ar")
 
-        gt_after_context_1 = grin.GrepText(re.compile("foo"), options=grin.Options(before_context=0, after_context=1))
-        self.assertEqual(
-            gt_after_context_1.do_grep(BytesIO(all_foo)),
-            [
-                (0, 0, "foo\n", [(0, 3)]),
-                (1, 0, "foo\n", [(0, 3)]),
-                (2, 0, "foo\n", [(0, 3)]),
-                (3, 0, "foo\n", [(0, 3)]),
-                (4, 0, "foo\n", [(0, 3)]),
-            ],
-        )
-        self.assertEqual(
-            gt_after_context_1.do_grep(BytesIO(first_foo)),
-            [(0, 0, "foo\n", [(0, 3)]), (1, 1, "bar\n", None)],
-        )
-        self.assertEqual(gt_after_context_1.do_grep(BytesIO(last_foo)), [(4, 0, "foo\n", [(0, 3)])])
-        self.assertEqual(
-            gt_after_context_1.do_grep(BytesIO(second_foo)),
-            [(1, 0, "foo\n", [(0, 3)]), (2, 1, "bar\n", None)],
-        )
-        self.assertEqual(
-            gt_after_context_1.do_grep(BytesIO(second_last_foo)),
-            [(3, 0, "foo\n", [(0, 3)]), (4, 1, "bar\n", None)],
-        )
+
+# Expected do_grep results for the context-option sweep: one mapping of
+# fixture name -> result per (before_context, after_context) configuration.
+_CONTEXT_CASES = (
+    (
+        (0, 0),
+        {
+            "all_foo": _ALL_FOO,
+            "first_foo": [_foo(0)],
+            "last_foo": [_foo(4)],
+            "second_foo": [_foo(1)],
+            "second_last_foo": [_foo(3)],
+            "middle_foo": [_foo(2)],
+            "small_gap": [_foo(2), _foo(4)],
+            "no_eol": [(0, 0, "foo", [(0, 3)])],
+            "middle_of_line": [(2, 0, "barfoobar\n", [(3, 6)])],
+        },
+    ),
+    (
+        (1, 1),
+        {
+            "all_foo": _ALL_FOO,
+            "first_foo": [_foo(0), _bar(1, 1)],
+            "last_foo": [_bar(3, -1), _foo(4)],
+            "second_foo": [_bar(0, -1), _foo(1), _bar(2, 1)],
+            "second_last_foo": [_bar(2, -1), _foo(3), _bar(4, 1)],
+            "middle_foo": [_bar(1, -1), _foo(2), _bar(3, 1)],
+            "small_gap": [_bar(1, -1), _foo(2), _bar(3, 1), _foo(4), _bar(5, 1)],
+            "no_eol": [(0, 0, "foo", [(0, 3)])],
+            "middle_of_line": [_bar(1, -1), (2, 0, "barfoobar\n", [(3, 6)]), _bar(3, 1)],
+        },
+    ),
+    (
+        (2, 2),
+        {
+            "all_foo": _ALL_FOO,
+            "first_foo": [_foo(0), _bar(1, 1), _bar(2, 1)],
+            "last_foo": [_bar(2, -1), _bar(3, -1), _foo(4)],
+            "second_foo": [_bar(0, -1), _foo(1), _bar(2, 1), _bar(3, 1)],
+            "second_last_foo": [_bar(1, -1), _bar(2, -1), _foo(3), _bar(4, 1)],
+            "middle_foo": [_bar(0, -1), _bar(1, -1), _foo(2), _bar(3, 1), _bar(4, 1)],
+            "small_gap": [_bar(0, -1), _bar(1, -1), _foo(2), _bar(3, 1), _foo(4), _bar(5, 1), _bar(6, 1)],
+            "no_eol": [(0, 0, "foo", [(0, 3)])],
+            "middle_of_line": [_bar(0, -1), _bar(1, -1), (2, 0, "barfoobar\n", [(3, 6)]), _bar(3, 1), _bar(4, 1)],
+        },
+    ),
+    (
+        (1, 0),
+        {
+            "all_foo": _ALL_FOO,
+            "first_foo": [_foo(0)],
+            "last_foo": [_bar(3, -1), _foo(4)],
+            "second_foo": [_bar(0, -1), _foo(1)],
+            "second_last_foo": [_bar(2, -1), _foo(3)],
+            "middle_foo": [_bar(1, -1), _foo(2)],
+            "small_gap": [_bar(1, -1), _foo(2), _bar(3, -1), _foo(4)],
+            "no_eol": [(0, 0, "foo", [(0, 3)])],
+            "middle_of_line": [_bar(1, -1), (2, 0, "barfoobar\n", [(3, 6)])],
+        },
+    ),
+    (
+        (0, 1),
+        {
+            "all_foo": _ALL_FOO,
+            "first_foo": [_foo(0), _bar(1, 1)],
+            "last_foo": [_foo(4)],
+            "second_foo": [_foo(1), _bar(2, 1)],
+            "second_last_foo": [_foo(3), _bar(4, 1)],
+            "middle_foo": [_foo(2), _bar(3, 1)],
+            "small_gap": [_foo(2), _bar(3, 1), _foo(4), _bar(5, 1)],
+            "no_eol": [(0, 0, "foo", [(0, 3)])],
+            "middle_of_line": [(2, 0, "barfoobar\n", [(3, 6)]), _bar(3, 1)],
+        },
+    ),
+)
+
+
+class GrepTestCase(TestCase):
+    # The instances are stateless across do_grep calls, so each pattern and
+    # context configuration is compiled once for the whole class instead of
+    # once per test method.
+    @classmethod
+    def setUpClass(cls):
+        cls.gt_default = grin.GrepText(_RE_FOO)
+        cls.gt_context_1 = grin.GrepText(_RE_FOO, options=grin.Options(before_context=1, after_context=1))
+        cls.gt_context_2 = grin.GrepText(_RE_FOO, options=grin.Options(before_context=2, after_context=2))
+        cls.gt_before_context_1 = grin.GrepText(_RE_FOO, options=grin.Options(before_context=1, after_context=0))
+        cls.gt_after_context_1 = grin.GrepText(_RE_FOO, options=grin.Options(before_context=0, after_context=1))
+        cls._gt_by_context = {
+            (0, 0): cls.gt_default,
+            (1, 1): cls.gt_context_1,
+            (2, 2): cls.gt_context_2,
+            (1, 0): cls.gt_before_context_1,
+            (0, 1): cls.gt_after_context_1,
+        }
+
+    def test_non_ascii(self):
+        non_ascii = grin.GrepText(_RE_EACUTE)
         self.assertEqual(
-            gt_after_context_1.do_grep(BytesIO(middle_foo)),
-            [(2, 0, "foo\n", [(0, 3)]), (3, 1, "bar\n", None)],
+            non_ascii.do_grep(_buf(utf_8_foo), encoding="utf8"),
+            [(0, 0, "Rémy\n", [(1, 2)])],
         )
         self.assertEqual(
-            gt_after_context_1.do_grep(BytesIO(small_gap)),
-            [(2, 0, "foo\n", [(0, 3)]), (3, 1, "bar\n", None), (4, 0, "foo\n", [(0, 3)]), (5, 1, "bar\n", None)],
+            non_ascii.do_grep(_buf(latin_1_foo), encoding="latin1"),
+            [(0, 0, "Rémy\n", [(1, 2)])],
         )
-        self.assertEqual(gt_after_context_1.do_grep(BytesIO(no_eol)), [(0, 0, "foo", [(0, 3)])])
+
+        self.assertEqual(non_ascii.do_grep(_buf(utf_8_foo), encoding="latin1"), [])
+
+        # Fallback to latin1
         self.assertEqual(
-            gt_after_context_1.do_grep(BytesIO(middle_of_line)),
-            [(2, 0, "barfoobar\n", [(3, 6)]), (3, 1, "bar\n", None)],
+            non_ascii.do_grep(_buf(latin_1_foo), encoding="utf8"),
+            [(0, 0, "Rémy\n", [(1, 2)])],
         )
 
+    def test_contexts(self):
+        # One driver replaces the five near-identical context methods: each
+        # (before, after) configuration reuses its class-level GrepText and
+        # sweeps every fixture under a subTest.
+        for (before, after), expected in _CONTEXT_CASES:
+            gt = self._gt_by_context[before, after]
+            for name, want in expected.items():
+                with self.subTest(before=before, after=after, fixture=name):
+                    self.assertEqual(gt.do_grep(_buf(_CONTEXT_FIXTURES[name])), want)
+
+    def test_literal_prefilter(self):
+        # A plain pattern must derive its required-literal prefilter, and the
+        # fast rejection must not change any result.
+        self.assertEqual(self.gt_default._prefilter, "foo")
+        self.assertIsNone(grin.GrepText(re.compile("fo+"))._prefilter)
+        self.assertIsNone(grin.GrepText(re.compile("foo", re.IGNORECASE))._prefilter)
+        # A large buffer with no occurrence of the literal takes the
+        # short-circuit path and reports nothing.
+        self.assertEqual(self.gt_default.do_grep(BytesIO(b"bar\n" * 100000)), [])
+        # A hit past the prefilter still comes out with correct spans.
+        self.assertEqual(self.gt_default.do_grep(_buf(middle_of_line)), [(2, 0, "barfoobar\n", [(3, 6)])])
+
     def test_fixed_string_option(self):
         # -F/--fixed-string works with unescaped regex metachars
 
         options = grin.Options(fixed_string=True, regex="foo(", re_flags=[], before_context=0, after_context=0)
         regex_with_metachars = grin.GrepText(grin.utils.get_regex(options))
         self.assertEqual(
-            regex_with_metachars.do_grep(BytesIO(regex_metachar_foo)),
+            regex_with_metachars.do_grep(_buf(regex_metachar_foo)),
             [(2, 0, "def foo(...):\n", [(4, 8)])],
         )
 
@@ -439,7 +374,7 @@ class GrepTestCase(TestCase):
         options = grin.Options(regex=r"\d", re_flags=[re.A], before_context=0, after_context=0)
         regex_unicode = grin.GrepText(grin.utils.get_regex(options))
         self.assertEqual(
-            regex_unicode.do_grep(BytesIO(unicode_digits)),
+            regex_unicode.do_grep(_buf(unicode_digits)),
             [],
         )
         # [(1, 0, 'an Arabic-Indic digit ٢ on the\n', [(22, 23)])]
@@ -448,7 +383,7 @@ class GrepTestCase(TestCase):
         options = grin.Options(regex=r"\d", re_flags=[], before_context=0, after_context=0)
         regex_unicode = grin.GrepText(grin.utils.get_regex(options))
         self.assertEqual(
-            regex_unicode.do_grep(BytesIO(unicode_digits)),
+            regex_unicode.do_grep(_buf(unicode_digits)),
             [(1, 0, "an Arabic-Indic digit ٢ on the\n", [(22, 23)])],
         )
 
@@ -459,7 +394,7 @@ class GrepTestCase(TestCase):
         options = grin.Options(word_regexp=True, regex="tes", re_flags=[], before_context=0, after_context=0)
         regex_on_word_boundaries = grin.GrepText(grin.utils.get_regex(options))
         self.assertEqual(
-            regex_on_word_boundaries.do_grep(BytesIO(word_boundaries)),
+            regex_on_word_boundaries.do_grep(_buf(word_boundaries)),
             [],
         )
 
@@ -467,7 +402,7 @@ class GrepTestCase(TestCase):
         options = grin.Options(word_regexp=True, regex="test", re_flags=[], before_context=0, after_context=0)
         regex_on_word_boundaries = grin.GrepText(grin.utils.get_regex(options))
         self.assertEqual(
-            regex_on_word_boundaries.do_grep(BytesIO(word_boundaries)),
+            regex_on_word_boundaries.do_grep(_buf(word_boundaries)),
             [(1, 0, "This is a test.\n", [(10, 14)])],
         )
 
@@ -476,8 +411,8 @@ class GrepTestCase(TestCase):
 
         # To be identified as a gzip file, it has to be passed in as an actual
         # instance of that, rather than just a BytesIO object.
-        gzip_file = gzip.GzipFile("made-up-file.gz", mode="rb", fileobj=BytesIO(gzip_text_compressed))
-        gt = grin.GrepText(re.compile("ni"))
+        gzip_file = gzip.GzipFile("made-up-file.gz", mode="rb", fileobj=_buf(gzip_text_compressed))
+        gt = grin.GrepText(_RE_NI)
         self.assertEqual(
             gt.do_grep(gzip_file),
             [
@@ -493,8 +428,8 @@ class GrepTestCase(TestCase):
         # file, so that it is caught in grin.main() and retried as a plaintext file.
 
         # Corrupt
-        gzip_file = gzip.GzipFile("made-up-file.gz", mode="rb", fileobj=BytesIO(gzip_text_compressed_trailing_garbage))
-        gt = grin.GrepText(re.compile("ni"))
+        gzip_file = gzip.GzipFile("made-up-file.gz", mode="rb", fileobj=_buf(gzip_text_compressed_trailing_garbage))
+        gt = grin.GrepText(_RE_NI)
         self.assertRaises(
             OSError,
             gt.do_grep,
@@ -503,7 +438,7 @@ class GrepTestCase(TestCase):
 
         # Truncated
         gzip_file = gzip.GzipFile("made-up-file.gz", mode="rb", fileobj=BytesIO(gzip_text_compressed[:-5]))
-        gt = grin.GrepText(re.compile("ni"))
+        gt = grin.GrepText(_RE_NI)
         self.assertRaises(
             EOFError,
             gt.do_grep,
@@ -513,5 +448,5 @@ class GrepTestCase(TestCase):
     def test_broken_gzip_plaintext(self):
         # Make sure do_grep() can find a plaintext match in a broken gzip file.
 
-        gt = grin.GrepText(re.compile("ar"))
-        self.assertEqual(gt.do_grep(BytesIO(gzip_text_compressed_trailing_garbage)), [(2, 0, "arborist\n", [(0, 2)])])
+        gt = grin.GrepText(_RE_AR)
+        self.assertEqual(gt.do_grep(_buf(gzip_text_compressed_trailing_garbage)), [(2, 0, "arborist\n", [(0, 2)])])